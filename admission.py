@@ -0,0 +1,241 @@
+"""
+Admission control in front of the database connection pool.
+
+Requests are admitted against a global concurrency budget (sized to the pool)
+and an optional per-route limit. When no slot is free the request waits in a
+bounded, priority-ordered queue until its deadline; once the queue is full, or
+the deadline passes, it is rejected immediately with 429/503 and a
+``Retry-After`` header instead of piling up on the pool.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+# Load environment variables
+load_dotenv()
+
+# Lower value = served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", os.getenv("DB_POOL_SIZE", 10)))
+DEFAULT_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 50))
+DEFAULT_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 2.0))
+DEFAULT_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 1))
+# Cap on concurrent list/search queries so they cannot starve cheap lookups
+LIST_MAX_CONCURRENCY = int(os.getenv("ADMISSION_LIST_MAX_CONCURRENCY", max(1, DEFAULT_MAX_CONCURRENCY // 2)))
+
+
+@dataclass
+class RouteLimit:
+    """Concurrency and queueing limits for a single route"""
+    max_concurrency: Optional[int] = None  # None = bounded only by the global limit
+    max_queue: int = DEFAULT_MAX_QUEUE
+    queue_timeout: float = DEFAULT_QUEUE_TIMEOUT
+
+
+@dataclass
+class RouteStats:
+    in_flight: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    admitted: int = 0
+    rejected_queue_full: int = 0
+    rejected_timeout: int = 0
+    total_wait_seconds: float = 0.0
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    route: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionRejected(HTTPException):
+    """Raised when a request cannot be admitted; rendered as 429/503 with Retry-After"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class AdmissionController:
+    """Priority admission queue shared by all routes of one worker process"""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        retry_after: int = DEFAULT_RETRY_AFTER,
+    ):
+        self.max_concurrency = max_concurrency
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.routes: Dict[str, RouteLimit] = {}
+        self.stats: Dict[str, RouteStats] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def configure_route(self, route: str, limit: RouteLimit) -> None:
+        self.routes[route] = limit
+        self.stats.setdefault(route, RouteStats())
+
+    def _limit(self, route: str) -> RouteLimit:
+        if route not in self.routes:
+            self.configure_route(route, RouteLimit())
+        return self.routes[route]
+
+    def _has_capacity(self, route: str) -> bool:
+        if self.in_flight >= self.max_concurrency:
+            return False
+        limit = self._limit(route)
+        if limit.max_concurrency is not None:
+            return self.stats[route].in_flight < limit.max_concurrency
+        return True
+
+    def _grant(self, route: str) -> None:
+        self.in_flight += 1
+        stats = self.stats[route]
+        stats.in_flight += 1
+        stats.admitted += 1
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+        self.stats[waiter.route].queued -= 1
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the highest-priority waiters whose route has room"""
+        if not self._waiters or self.in_flight >= self.max_concurrency:
+            return
+        for waiter in sorted(self._waiters):
+            if self.in_flight >= self.max_concurrency:
+                break
+            if waiter.future.done() or not self._has_capacity(waiter.route):
+                continue
+            self._remove_waiter(waiter)
+            self._grant(waiter.route)
+            waiter.future.set_result(True)
+
+    async def acquire(self, route: str, priority: int = PRIORITY_NORMAL) -> None:
+        limit = self._limit(route)
+        stats = self.stats[route]
+
+        # Fast path: nobody ahead of us and a slot is free
+        if not self._waiters and self._has_capacity(route):
+            self._grant(route)
+            return
+
+        if stats.queued >= limit.max_queue:
+            stats.rejected_queue_full += 1
+            raise AdmissionRejected(
+                status_code=429,
+                detail="Too many requests queued for this endpoint, please retry later",
+                retry_after=self.retry_after,
+            )
+
+        waiter = _Waiter(priority, next(self._seq), route, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        # A slot may already be free for this route even though others are waiting
+        self._dispatch()
+
+        started = time.monotonic()
+        try:
+            # Unlike wait_for, wait never swallows a cancellation that races with the grant
+            await asyncio.wait({waiter.future}, timeout=limit.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away while queued
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(route)
+            else:
+                waiter.future.cancel()
+                self._remove_waiter(waiter)
+            raise
+        # Deadline passed without a grant (a grant in the same tick still counts)
+        if not waiter.future.done():
+            waiter.future.cancel()
+            self._remove_waiter(waiter)
+            stats.rejected_timeout += 1
+            raise AdmissionRejected(
+                status_code=503,
+                detail="Server is busy, please retry later",
+                retry_after=max(self.retry_after, math.ceil(limit.queue_timeout)),
+            )
+        # Only admitted requests count towards the average wait
+        stats.total_wait_seconds += time.monotonic() - started
+
+    def release(self, route: str) -> None:
+        self.in_flight -= 1
+        self.stats[route].in_flight -= 1
+        self._dispatch()
+
+    def snapshot(self) -> dict:
+        """Current queue depth, in-flight counts and rejection counters"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "routes": {
+                route: {
+                    "max_concurrency": self.routes[route].max_concurrency,
+                    "max_queue": self.routes[route].max_queue,
+                    "queue_timeout": self.routes[route].queue_timeout,
+                    "in_flight": stats.in_flight,
+                    "queued": stats.queued,
+                    "max_queued": stats.max_queued,
+                    "admitted": stats.admitted,
+                    "rejected_queue_full": stats.rejected_queue_full,
+                    "rejected_timeout": stats.rejected_timeout,
+                    "avg_wait_ms": round(stats.total_wait_seconds * 1000 / stats.admitted, 2)
+                    if stats.admitted else 0.0,
+                }
+                for route, stats in self.stats.items()
+            },
+        }
+
+
+controller = AdmissionController()
+
+
+def admit(
+    route: str,
+    priority: int = PRIORITY_NORMAL,
+    heavy_params: Sequence[str] = (),
+    **limits,
+):
+    """
+    Dependency factory guarding a route with the shared admission controller.
+
+    Must be listed before ``get_db`` so a pooled connection is only checked out
+    once the request has been admitted. Requests carrying any of
+    ``heavy_params`` in their query string are queued at ``PRIORITY_LOW``.
+    """
+    if limits:
+        controller.configure_route(route, RouteLimit(**limits))
+
+    async def dependency(request: Request):
+        effective = priority
+        if any(request.query_params.get(param) for param in heavy_params):
+            effective = PRIORITY_LOW
+        await controller.acquire(route, effective)
+        try:
+            yield
+        finally:
+            controller.release(route)
+
+    return dependency
@@ -0,0 +1,289 @@
+"""
+Change feed: write handlers record events, every worker fans them out to its
+connected clients.
+
+Each write appends a ``ChangeEvent`` row and issues ``pg_notify`` with its id in
+the same transaction, so the notification is only delivered once the write
+commits. Every worker keeps one dedicated LISTEN connection (outside the
+request pool), loads the notified rows and pushes them to its subscribers.
+Clients that reconnect replay missed events from the table by id.
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+import asyncpg
+from dotenv import load_dotenv
+from sqlalchemy import select, text, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import DATABASE_URL
+from models import ChangeEvent, ChangeAction
+
+# Load environment variables
+load_dotenv()
+
+CHANNEL = "change_events"
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", 1000))
+REPLAY_LIMIT = int(os.getenv("CHANGE_FEED_REPLAY_LIMIT", 1000))
+RETENTION_HOURS = int(os.getenv("CHANGE_FEED_RETENTION_HOURS", 24))
+RECONNECT_DELAY = float(os.getenv("CHANGE_FEED_RECONNECT_DELAY", 5.0))
+PRUNE_INTERVAL = float(os.getenv("CHANGE_FEED_PRUNE_INTERVAL", 300))
+# Ids per NOTIFY payload; Postgres caps payloads at 8000 bytes
+NOTIFY_BATCH_SIZE = 500
+
+# Highest id handed out by the change_events sequence, NULL before the first
+LAST_ISSUED_ID = text("SELECT pg_sequence_last_value(pg_get_serial_sequence(:table, 'id')::regclass)")
+
+
+def listen_dsn(url: str) -> str:
+    """
+    Plain asyncpg DSN for the LISTEN connection. Unlike the pooled engines it
+    keeps the URL's sslmode, so a local server without SSL works too.
+    """
+    return urlparse(url)._replace(scheme="postgresql").geturl()
+
+
+async def record_event(
+    db: AsyncSession,
+    resource: str,
+    action: ChangeAction,
+    resource_id: int,
+    data: Optional[Dict[str, Any]] = None,
+    department: Optional[str] = None,
+    manager_id: Optional[int] = None,
+) -> ChangeEvent:
+    """Add a change event to the current transaction; it is published on commit"""
+    event = ChangeEvent(
+        resource=resource,
+        action=action.value,
+        resource_id=resource_id,
+        department=department,
+        manager_id=manager_id,
+        data=data or {},
+    )
+    db.add(event)
+    await db.flush()
+    await _notify(db, [event.id])
+    return event
+
+
+async def record_events(db: AsyncSession, events: List[ChangeEvent]) -> None:
+    """Bulk variant of ``record_event`` for background jobs: one NOTIFY per batch of ids"""
+    if not events:
+        return
+    db.add_all(events)
+    await db.flush()
+    await _notify(db, [event.id for event in events])
+
+
+async def _notify(db: AsyncSession, ids: List[int]) -> None:
+    for start in range(0, len(ids), NOTIFY_BATCH_SIZE):
+        payload = ",".join(str(event_id) for event_id in ids[start:start + NOTIFY_BATCH_SIZE])
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+
+def serialize_event(event: ChangeEvent) -> Dict[str, Any]:
+    return {
+        "id": event.id,
+        "resource": event.resource,
+        "action": event.action,
+        "resource_id": event.resource_id,
+        "department": event.department,
+        "manager_id": event.manager_id,
+        "data": event.data,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+def event_matches(event: Dict[str, Any], department: Optional[str], manager_id: Optional[int]) -> bool:
+    """
+    Apply subscriber filters. An event matches on its current or previous
+    department/manager, so subscribers also see records moving out of scope.
+    """
+    previous = event["data"].get("previous", {}) if isinstance(event["data"], dict) else {}
+    if department:
+        departments = [event["department"], previous.get("department")]
+        if not any(d and department.lower() in d.lower() for d in departments):
+            return False
+    if manager_id is not None:
+        if manager_id not in (event["manager_id"], previous.get("manager_id")):
+            return False
+    return True
+
+
+async def latest_event_id(db: AsyncSession) -> int:
+    result = await db.execute(select(func.coalesce(func.max(ChangeEvent.id), 0)))
+    return result.scalar()
+
+
+async def load_events_since(db: AsyncSession, last_event_id: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Events after ``last_event_id`` in id order, or None if the client is too far
+    behind (pruned or more than REPLAY_LIMIT events) and must reload instead.
+    """
+    oldest = (await db.execute(select(func.min(ChangeEvent.id)))).scalar()
+    if oldest is None:
+        # Everything was pruned: the client is current only if nothing was issued after its id
+        issued = (await db.execute(LAST_ISSUED_ID, {"table": ChangeEvent.__tablename__})).scalar()
+        return None if last_event_id < (issued or 0) else []
+    if last_event_id < oldest - 1:
+        return None
+    result = await db.execute(
+        select(ChangeEvent)
+        .where(ChangeEvent.id > last_event_id)
+        .order_by(ChangeEvent.id)
+        .limit(REPLAY_LIMIT + 1)
+    )
+    events = result.scalars().all()
+    if len(events) > REPLAY_LIMIT:
+        return None
+    return [serialize_event(event) for event in events]
+
+
+class Subscription:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """Per-worker LISTEN connection fanning committed events out to subscribers"""
+
+    def __init__(self, dsn: Optional[str] = None):
+        self.dsn = dsn or listen_dsn(DATABASE_URL)
+        self.subscribers: Set[Subscription] = set()
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._conn: Optional[asyncpg.Connection] = None
+        self._pending: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._last_seen: Optional[int] = None
+        self._last_pruned = 0.0
+        # True while LISTEN is attached; caches invalidated by the feed check this
+        self.connected = False
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription()
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``callback`` with every event, e.g. to keep in-process caches current"""
+        self.listeners.append(callback)
+
+    def _broadcast(self, event: Dict[str, Any]) -> None:
+        for callback in self.listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"❌ Change feed listener failed on event {event['id']}: {e}")
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it, the client resumes from its Last-Event-ID
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self._pending.update(int(event_id) for event_id in payload.split(","))
+        except ValueError:
+            return
+        self._wakeup.set()
+
+    async def start(self, after_id: Optional[int] = None) -> None:
+        """
+        Start listening. With ``after_id``, events committed after that id are
+        replayed to listeners first, so a cache built after reading
+        ``latest_event_id()`` misses nothing committed in between.
+        """
+        self._last_seen = after_id
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._conn and not self._conn.is_closed():
+            await self._conn.close()
+
+    async def _connect(self) -> asyncpg.Connection:
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(CHANNEL, self._on_notify)
+        return conn
+
+    async def _fetch(self, query: str, *args) -> None:
+        rows = await self._conn.fetch(query, *args)
+        for row in rows:
+            self._last_seen = max(self._last_seen, row["id"])
+            data = row["data"]
+            self._broadcast({
+                "id": row["id"],
+                "resource": row["resource"],
+                "action": row["action"],
+                "resource_id": row["resource_id"],
+                "department": row["department"],
+                "manager_id": row["manager_id"],
+                "data": json.loads(data) if isinstance(data, str) else data,
+                "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+            })
+
+    async def _prune_if_due(self) -> None:
+        """Enforce CHANGE_FEED_RETENTION_HOURS at most once per PRUNE_INTERVAL, busy or idle"""
+        if time.monotonic() - self._last_pruned < PRUNE_INTERVAL:
+            return
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=RETENTION_HOURS)
+        await self._conn.execute(f"DELETE FROM {ChangeEvent.__tablename__} WHERE created_at < $1", cutoff)
+        self._last_pruned = time.monotonic()
+
+    async def _run(self) -> None:
+        columns = "id, resource, action, resource_id, department, manager_id, data, created_at"
+        table = ChangeEvent.__tablename__
+        while True:
+            try:
+                self._conn = await self._connect()
+                if self._last_seen is not None:
+                    # Catch up on anything committed before we (re)connected
+                    await self._fetch(
+                        f"SELECT {columns} FROM {table} WHERE id > $1 ORDER BY id", self._last_seen
+                    )
+                else:
+                    self._last_seen = await self._conn.fetchval(f"SELECT coalesce(max(id), 0) FROM {table}")
+                self.connected = True
+                print("✅ Change feed listening")
+
+                while True:
+                    await self._prune_if_due()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=PRUNE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        continue
+                    self._wakeup.clear()
+                    ids, self._pending = sorted(self._pending), set()
+                    # Fetch by id rather than "id > last": sequence ids can commit out of order
+                    await self._fetch(
+                        f"SELECT {columns} FROM {table} WHERE id = ANY($1::int[]) ORDER BY id", ids
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connected = False
+                print(f"❌ Change feed connection lost: {e}")
+                if self._conn and not self._conn.is_closed():
+                    await self._conn.close()
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+feed = ChangeFeed()
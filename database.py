@@ -53,21 +53,32 @@ def prepare_database_url(url: str) -> str:
 prepared_url = prepare_database_url(DATABASE_URL)
 print(f"Connecting to database: {prepared_url.split('@')[0]}@***")
 
-# Create async engine with Neon-optimized settings
-engine = create_async_engine(
-    prepared_url,
-    echo=True,
-    pool_size=10,
-    max_overflow=0,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    connect_args={
-        "ssl": "require",  # This is how asyncpg handles SSL
-        "server_settings": {
-            "application_name": "employee_management_api",
+# Connection pool sizing; the admission controller sizes its budget from DB_POOL_SIZE
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+def create_engine_with_pool(
+    pool_size: int, application_name: str = "employee_management_api", echo: bool = True
+):
+    """Create an async engine with Neon-optimized settings and its own pool"""
+    return create_async_engine(
+        prepared_url,
+        echo=echo,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        connect_args={
+            "ssl": "require",  # This is how asyncpg handles SSL
+            "server_settings": {
+                "application_name": application_name,
+            }
         }
-    }
-)
+    )
+
+# Create async engine for request handlers
+engine = create_engine_with_pool(DB_POOL_SIZE)
 
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
@@ -78,9 +89,13 @@ AsyncSessionLocal = sessionmaker(
 Base = declarative_base()
 
 async def init_db():
-    """Initialize database tables"""
+    """Initialize database tables (run migrate.py to add indexes to existing tables)"""
     try:
         async with engine.begin() as conn:
+            # Trigram indexes back the ILIKE '%...%' filters and searches
+            has_trgm = await conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+            if has_trgm.scalar() is None:
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             await conn.run_sync(Base.metadata.create_all)
         print("✅ Database tables created successfully!")
     except Exception as e:
@@ -0,0 +1,313 @@
+"""
+In-process prefix index over the people directory for typeahead.
+
+Built at startup from a single users/employees query, then kept current by the
+user/employee write handlers and by change feed events from other workers.
+Each distinct token maps to the set of users carrying it, and the distinct
+tokens are kept in small sorted lists keyed by their first characters and
+their length, so an update only touches the sets of the tokens it changes.
+Queries walk the matching tokens shortest first, i.e. best possible score
+first, and stop as soon as nothing left can enter the top results. Past
+``DIRECTORY_MAX_ENTRIES`` users the index disables itself and
+``/api/v1/directory/suggest`` falls back to the database.
+"""
+import heapq
+import os
+import re
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User, Employee
+
+# Load environment variables
+load_dotenv()
+
+MAX_ENTRIES = int(os.getenv("DIRECTORY_MAX_ENTRIES", 200000))
+# Tokens are bucketed by up to this many leading characters (and their length)
+PREFIX_LENGTH = 3
+
+USER_FIELDS = ("username", "email", "first_name", "last_name", "is_active")
+EMPLOYEE_FIELDS = ("employee_id", "department")
+
+# Relative weight of a match in each field
+FIELD_WEIGHTS = {
+    "username": 5,
+    "employee_id": 5,
+    "first_name": 4,
+    "last_name": 4,
+    "email": 3,
+    "department": 1,
+}
+
+MAX_WEIGHT = max(FIELD_WEIGHTS.values())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def user_fields(user: User) -> Dict[str, Any]:
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+
+def employee_fields(employee: Employee) -> Dict[str, Any]:
+    return {"user_id": employee.user_id, **{field: getattr(employee, field) for field in EMPLOYEE_FIELDS}}
+
+
+def _tokens(entry: Dict[str, Any]) -> Dict[str, int]:
+    """Searchable tokens of an entry with the best field weight for each"""
+    tokens: Dict[str, int] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = entry.get(field)
+        if not value:
+            continue
+        value = value.lower()
+        # Whole value (e.g. "john.doe@x.com") plus its words ("john", "doe", "x", "com")
+        for token in {value, *_WORD.findall(value)}:
+            if tokens.get(token, 0) < weight:
+                tokens[token] = weight
+    return tokens
+
+
+def _bucket_keys(token: str) -> List[Tuple[str, int]]:
+    return [(token[:n], len(token)) for n in range(1, min(len(token), PREFIX_LENGTH) + 1)]
+
+
+def _term_ratio(term_length: int, token_length: int) -> float:
+    # Exact tokens beat prefixes; shorter completions beat longer ones
+    return 2.0 if token_length == term_length else term_length / token_length
+
+
+def _term_score(tokens: Dict[str, int], term: str) -> float:
+    """Best score of one query term against the tokens of one entry, 0 if none matches"""
+    best = 0.0
+    for token, weight in tokens.items():
+        if token.startswith(term):
+            score = weight * _term_ratio(len(term), len(token))
+            if score > best:
+                best = score
+    return best
+
+
+class DirectoryIndex:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.ready = False
+        self.entries: Dict[int, Dict[str, Any]] = {}  # user id -> fields
+        self._employee_users: Dict[int, int] = {}  # employee pk -> user id
+        self._entry_tokens: Dict[int, Dict[str, int]] = {}  # user id -> token -> field weight
+        self._postings: Dict[str, Set[int]] = {}  # token -> user ids
+        self._token_weights: Dict[str, int] = {}  # token -> highest field weight it has had
+        self._buckets: Dict[Tuple[str, int], List[str]] = {}  # (leading chars, length) -> sorted tokens
+        self._max_length = 0
+
+    async def build(self, db: AsyncSession) -> None:
+        result = await db.execute(
+            select(
+                User.id, *(getattr(User, f) for f in USER_FIELDS),
+                Employee.id.label("employee"), *(getattr(Employee, f) for f in EMPLOYEE_FIELDS),
+            ).outerjoin(Employee, Employee.user_id == User.id)
+        )
+        rows = result.mappings().all()
+        self.entries.clear()
+        self._employee_users.clear()
+        self._entry_tokens.clear()
+        self._postings = {}
+        self._token_weights = {}
+        self._buckets = {}
+        self._max_length = 0
+        if len(rows) > self.max_entries:
+            self.ready = False
+            print(f"⚠️ Directory has {len(rows)} users, over DIRECTORY_MAX_ENTRIES; suggestions use the database")
+            return
+
+        for row in rows:
+            entry = dict(row)
+            user_id = entry.pop("id")
+            self.entries[user_id] = entry
+            if entry["employee"] is not None:
+                self._employee_users[entry["employee"]] = user_id
+            tokens = _tokens(entry)
+            self._entry_tokens[user_id] = tokens
+            for token, weight in tokens.items():
+                self._postings.setdefault(token, set()).add(user_id)
+                if self._token_weights.get(token, 0) < weight:
+                    self._token_weights[token] = weight
+        for token in self._postings:
+            for key in _bucket_keys(token):
+                self._buckets.setdefault(key, []).append(token)
+            self._max_length = max(self._max_length, len(token))
+        for bucket in self._buckets.values():
+            bucket.sort()
+        self.ready = True
+        print(f"✅ Directory index built: {len(self.entries)} users, {len(self._postings)} distinct tokens")
+
+    def _reindex(self, user_id: int) -> None:
+        old = self._entry_tokens.pop(user_id, {})
+        entry = self.entries.get(user_id)
+        tokens = _tokens(entry) if entry is not None else {}
+        if tokens:
+            self._entry_tokens[user_id] = tokens
+        for token in old.keys() - tokens.keys():
+            users = self._postings[token]
+            users.discard(user_id)
+            if not users:
+                # Last user with this token; drop it from its buckets as well
+                del self._postings[token]
+                del self._token_weights[token]
+                for key in _bucket_keys(token):
+                    bucket = self._buckets[key]
+                    del bucket[bisect_left(bucket, token)]
+                    if not bucket:
+                        del self._buckets[key]
+        for token, weight in tokens.items():
+            users = self._postings.get(token)
+            if users is None:
+                # Only tokens nobody had before are bisected into their buckets
+                self._postings[token] = {user_id}
+                for key in _bucket_keys(token):
+                    insort(self._buckets.setdefault(key, []), token)
+                self._max_length = max(self._max_length, len(token))
+            else:
+                users.add(user_id)
+            if self._token_weights.get(token, 0) < weight:
+                self._token_weights[token] = weight
+
+    def upsert_user(self, user_id: int, **fields) -> None:
+        if not self.ready:
+            return
+        if user_id not in self.entries:
+            if len(self.entries) >= self.max_entries:
+                self.ready = False
+                print("⚠️ Directory index is full; suggestions use the database")
+                return
+            self.entries[user_id] = {"employee": None}
+        self.entries[user_id].update((k, v) for k, v in fields.items() if k in USER_FIELDS)
+        self._reindex(user_id)
+
+    def remove_user(self, user_id: int) -> None:
+        entry = self.entries.pop(user_id, None)
+        if entry is None:
+            return
+        self._employee_users.pop(entry.get("employee"), None)
+        self._reindex(user_id)
+
+    def upsert_employee(self, employee_pk: int, user_id: Optional[int] = None, **fields) -> None:
+        if not self.ready:
+            return
+        user_id = user_id if user_id is not None else self._employee_users.get(employee_pk)
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return
+        self._employee_users[employee_pk] = user_id
+        entry["employee"] = employee_pk
+        entry.update((k, v) for k, v in fields.items() if k in EMPLOYEE_FIELDS)
+        self._reindex(user_id)
+
+    def remove_employee(self, employee_pk: int) -> None:
+        user_id = self._employee_users.pop(employee_pk, None)
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return
+        entry["employee"] = None
+        for field in EMPLOYEE_FIELDS:
+            entry[field] = None
+        self._reindex(user_id)
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """Change feed listener; also replays this worker's own writes, which is harmless"""
+        data = event.get("data") or {}
+        fields = {**data, **data.get("changes", {})}
+        resource_id = event["resource_id"]
+        if event["action"] == "deleted":
+            if event["resource"] == "user":
+                self.remove_user(resource_id)
+            else:
+                self.remove_employee(resource_id)
+        elif event["resource"] == "user":
+            self.upsert_user(resource_id, **fields)
+        else:
+            self.upsert_employee(resource_id, user_id=fields.pop("user_id", None), **fields)
+
+    def _tokens_of_length(self, term: str, length: int) -> Iterable[str]:
+        """Tokens of exactly ``length`` characters starting with ``term``"""
+        bucket = self._buckets.get((term[:PREFIX_LENGTH], length), ())
+        if len(term) <= PREFIX_LENGTH:
+            return bucket
+        matches = []
+        for position in range(bisect_left(bucket, term), len(bucket)):
+            if not bucket[position].startswith(term):
+                break
+            matches.append(bucket[position])
+        return matches
+
+    def _best_possible(self, term: str) -> float:
+        """Upper bound on what ``term`` can score against any entry"""
+        best = 0.0
+        for length in range(len(term), self._max_length + 1):
+            ratio = _term_ratio(len(term), length)
+            if MAX_WEIGHT * ratio <= best:
+                break
+            for token in self._tokens_of_length(term, length):
+                best = max(best, self._token_weights[token] * ratio)
+                if self._token_weights[token] == MAX_WEIGHT:
+                    break
+        return best
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        terms = _WORD.findall(query.lower())
+        if not terms:
+            return []
+        # Candidates come from the longest term, usually the most selective one;
+        # every term must match somewhere in the entry
+        driver = max(terms, key=len)
+        others = list(terms)
+        others.remove(driver)
+        # The most the other terms can add to a candidate's score
+        others_bound = sum(self._best_possible(term) for term in others)
+
+        top: List[Tuple[Tuple[bool, float], int]] = []  # min-heap of ((active, score), user id)
+        seen: Set[int] = set()
+
+        def complete(bound: float) -> bool:
+            # Active users rank first, so only active results at or above the bound are final
+            return len(top) >= limit and top[0][0] >= (True, bound)
+
+        for length in range(len(driver), self._max_length + 1):
+            ratio = _term_ratio(len(driver), length)
+            if complete(MAX_WEIGHT * ratio + others_bound):
+                break
+            tokens = sorted(self._tokens_of_length(driver, length), key=self._token_weights.get, reverse=True)
+            for token in tokens:
+                bound = self._token_weights[token] * ratio + others_bound
+                if complete(bound):
+                    break
+                for user_id in self._postings[token]:
+                    if user_id in seen:
+                        continue
+                    seen.add(user_id)
+                    entry_tokens = self._entry_tokens[user_id]
+                    score = 0.0
+                    for term in terms:
+                        term_score = _term_score(entry_tokens, term)
+                        if not term_score:
+                            break
+                        score += term_score
+                    else:
+                        item = ((bool(self.entries[user_id].get("is_active")), score), user_id)
+                        if len(top) < limit:
+                            heapq.heappush(top, item)
+                        else:
+                            heapq.heappushpop(top, item)
+                        if complete(bound):
+                            break
+
+        return [
+            {"user_id": user_id, **self.entries[user_id], "score": round(score, 3)}
+            for (_, score), user_id in sorted(top, reverse=True)
+        ]
+
+
+directory = DirectoryIndex()
@@ -56,6 +56,10 @@ case $COMMAND in
         echo "🧪 Running connection test in container..."
         docker-compose run --rm api python test_neon_connection.py
         ;;
+    "migrate")
+        echo "🔨 Running database migration..."
+        docker-compose run --rm api python migrate.py
+        ;;
     "sample-data")
         echo "📊 Creating sample data..."
         echo "⏳ Waiting for API to be ready..."
@@ -84,6 +88,7 @@ case $COMMAND in
         echo "  stop         - Stop all containers"
         echo "  logs         - Show container logs"
         echo "  test         - Test database connection"
+        echo "  migrate      - Add missing tables and indexes"
         echo "  sample-data  - Create sample data"
         echo "  shell        - Open shell in container"
         echo "  build        - Build Docker image"
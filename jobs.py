@@ -0,0 +1,305 @@
+"""
+Background job runner for bulk operations on employees.
+
+Jobs are rows in the ``jobs`` table. Workers claim them with
+``FOR UPDATE SKIP LOCKED`` and process their targets in id-ordered chunks.
+Each chunk commits together with the job's cursor and counters, so a job
+interrupted by a restart resumes after its last committed chunk once its
+heartbeat goes stale. Workers use their own engine, so long jobs never take
+connections from the request pool.
+"""
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database import create_engine_with_pool
+from models import Employee, User, Job, JobStatus, JobOperation, ChangeEvent, ChangeAction
+from change_feed import record_events
+
+# Load environment variables
+load_dotenv()
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", 500))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2.0))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 60))
+MAX_STORED_ERRORS = 100
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def target_filters(target: Dict[str, Any]) -> list:
+    """SQL conditions selecting the employees a job applies to"""
+    conditions = []
+    if target.get("employee_ids"):
+        conditions.append(Employee.id.in_(target["employee_ids"]))
+    if target.get("department"):
+        conditions.append(Employee.department == target["department"])
+    if target.get("status"):
+        conditions.append(Employee.status == target["status"])
+    if target.get("manager_id") is not None:
+        conditions.append(Employee.manager_id == target["manager_id"])
+    return conditions
+
+
+async def manager_chain(db: AsyncSession, employee_id: int) -> List[int]:
+    """``employee_id`` and every manager above it"""
+    chain = (
+        select(Employee.id, Employee.manager_id)
+        .where(Employee.id == employee_id)
+        .cte("chain", recursive=True)
+    )
+    chain = chain.union(
+        select(Employee.id, Employee.manager_id).join(chain, Employee.id == chain.c.manager_id)
+    )
+    result = await db.execute(select(chain.c.id))
+    return list(result.scalars().all())
+
+
+def job_progress(job: Job) -> Dict[str, Any]:
+    """Derived progress fields for ``JobResponse``"""
+    handled = job.processed + job.failed
+    progress = 1.0 if job.status == JobStatus.COMPLETED else (handled / job.total if job.total else 0.0)
+    rows_per_second = None
+    if job.started_at:
+        elapsed = ((job.finished_at or datetime.now(timezone.utc)) - job.started_at).total_seconds()
+        if elapsed > 0:
+            rows_per_second = round(handled / elapsed, 2)
+    return {"progress": round(min(progress, 1.0), 4), "rows_per_second": rows_per_second}
+
+
+def _employee_event(action: ChangeAction, row, data: Optional[dict] = None, **current) -> ChangeEvent:
+    return ChangeEvent(
+        resource="employee",
+        action=action.value,
+        resource_id=row.id,
+        department=current.get("department", row.department),
+        manager_id=current.get("manager_id", row.manager_id),
+        data=data or {},
+    )
+
+
+async def apply_operation(db: AsyncSession, job: Job, rows: list) -> None:
+    """Apply the job's operation to one chunk of employee rows"""
+    params = job.params
+    ids = [row.id for row in rows]
+    events: List[ChangeEvent] = []
+
+    if job.operation == JobOperation.SET_STATUS:
+        await db.execute(update(Employee).where(Employee.id.in_(ids)).values(status=params["new_status"]))
+        events = [
+            _employee_event(ChangeAction.UPDATED, row, {"changes": {"status": params["new_status"]}, "previous": {}})
+            for row in rows
+        ]
+
+    elif job.operation == JobOperation.TRANSFER_DEPARTMENT:
+        department = params["new_department"]
+        await db.execute(update(Employee).where(Employee.id.in_(ids)).values(department=department))
+        events = [
+            _employee_event(
+                ChangeAction.UPDATED, row,
+                {"changes": {"department": department}, "previous": {"department": row.department}},
+                department=department,
+            )
+            for row in rows
+        ]
+
+    elif job.operation == JobOperation.REASSIGN_MANAGER:
+        manager_id = params["new_manager_id"]
+        if manager_id is not None:
+            # The hierarchy may have changed since submission; never create a cycle
+            chain = set(await manager_chain(db, manager_id))
+            if chain & set(ids):
+                raise ValueError(f"Reporting to employee {manager_id} would create a management cycle")
+        await db.execute(update(Employee).where(Employee.id.in_(ids)).values(manager_id=manager_id))
+        events = [
+            _employee_event(
+                ChangeAction.UPDATED, row,
+                {"changes": {"manager_id": manager_id}, "previous": {"manager_id": row.manager_id}},
+                manager_id=manager_id,
+            )
+            for row in rows
+        ]
+
+    elif job.operation == JobOperation.DELETE_EMPLOYEES:
+        # Detach reports first so the manager_id foreign key does not block the delete.
+        # Read them before the UPDATE: RETURNING would only give the new, null manager_id
+        reports = await db.execute(
+            select(Employee.id, Employee.department, Employee.manager_id)
+            .where(Employee.manager_id.in_(ids), Employee.id.not_in(ids))
+            .with_for_update()
+        )
+        reports = reports.all()
+        if reports:
+            await db.execute(
+                update(Employee).where(Employee.id.in_([row.id for row in reports])).values(manager_id=None)
+            )
+        # Keep the old manager on the event and in previous so that manager's subscribers see them leave
+        events.extend(
+            _employee_event(
+                ChangeAction.UPDATED, row,
+                {"changes": {"manager_id": None}, "previous": {"manager_id": row.manager_id}},
+            )
+            for row in reports
+        )
+        await db.execute(delete(Employee).where(Employee.id.in_(ids)))
+        events.extend(_employee_event(ChangeAction.DELETED, row) for row in rows)
+        if params.get("delete_users"):
+            user_ids = [row.user_id for row in rows]
+            await db.execute(delete(User).where(User.id.in_(user_ids)))
+            events.extend(
+                ChangeEvent(
+                    resource="user", action=ChangeAction.DELETED.value, resource_id=row.user_id,
+                    department=row.department, manager_id=row.manager_id, data={},
+                )
+                for row in rows
+            )
+
+    else:
+        raise ValueError(f"Unknown job operation: {job.operation}")
+
+    await record_events(db, events)
+
+
+class JobRunner:
+    """Bounded pool of worker tasks with a dedicated connection budget"""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.engine = None
+        self.session_factory = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        # No SQL echo: idle workers poll for jobs every JOB_POLL_INTERVAL seconds
+        self.engine = create_engine_with_pool(self.workers, "employee_management_jobs", echo=False)
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.engine:
+            await self.engine.dispose()
+
+    def notify(self) -> None:
+        """Wake idle workers after a job was submitted in this process"""
+        self._wakeup.set()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job_id = await self._claim()
+                if job_id is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Job worker error: {e}")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    async def _claim(self) -> Optional[int]:
+        """Take a queued job, or a running one whose worker stopped heartbeating"""
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=JOB_LEASE_SECONDS)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Job)
+                .where(or_(
+                    Job.status == JobStatus.QUEUED,
+                    (Job.status == JobStatus.RUNNING) & (Job.heartbeat_at < stale),
+                ))
+                .order_by(Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = result.scalar_one_or_none()
+            if not job:
+                return None
+
+            if job.status == JobStatus.QUEUED:
+                total = await db.execute(
+                    select(func.count()).select_from(Employee).where(*target_filters(job.params["target"]))
+                )
+                job.total = total.scalar()
+                job.started_at = now
+            else:
+                print(f"♻️ Resuming job {job.id} after employee {job.cursor}")
+            job.status = JobStatus.RUNNING
+            job.worker_id = WORKER_ID
+            job.heartbeat_at = now
+            await db.commit()
+            return job.id
+
+    async def _lock_job(self, db: AsyncSession, job_id: int) -> Optional[Job]:
+        """Lock the job row for this chunk; None if it was cancelled or taken over"""
+        result = await db.execute(select(Job).where(Job.id == job_id).with_for_update())
+        job = result.scalar_one_or_none()
+        if not job or job.status != JobStatus.RUNNING or job.worker_id != WORKER_ID:
+            return None
+        return job
+
+    async def _run(self, job_id: int) -> None:
+        while True:
+            async with self.session_factory() as db:
+                job = await self._lock_job(db, job_id)
+                if not job:
+                    return
+
+                result = await db.execute(
+                    select(Employee.id, Employee.user_id, Employee.department, Employee.manager_id)
+                    .where(Employee.id > job.cursor, *target_filters(job.params["target"]))
+                    .order_by(Employee.id)
+                    .limit(JOB_CHUNK_SIZE)
+                    .with_for_update()
+                )
+                rows = result.all()
+                if not rows:
+                    # Only a job where every target row failed counts as failed
+                    job.status = JobStatus.FAILED if job.failed and not job.processed else JobStatus.COMPLETED
+                    job.finished_at = datetime.now(timezone.utc)
+                    await db.commit()
+                    print(f"✅ Job {job.id} {job.status.value}: {job.processed} processed, {job.failed} failed")
+                    return
+
+                errors = []
+                try:
+                    async with db.begin_nested():
+                        await apply_operation(db, job, rows)
+                    processed = len(rows)
+                except Exception:
+                    # Retry row by row so one bad row does not fail the whole chunk
+                    processed = 0
+                    for row in rows:
+                        try:
+                            async with db.begin_nested():
+                                await apply_operation(db, job, [row])
+                            processed += 1
+                        except Exception as e:
+                            errors.append({"employee_id": row.id, "error": str(e)})
+
+                job.cursor = rows[-1].id
+                job.processed += processed
+                job.failed += len(errors)
+                if errors and len(job.errors) < MAX_STORED_ERRORS:
+                    job.errors = (job.errors + errors)[:MAX_STORED_ERRORS]
+                job.heartbeat_at = datetime.now(timezone.utc)
+                await db.commit()
+
+
+runner = JobRunner()
@@ -5,8 +5,13 @@ import os
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from database import init_db, test_connection
-from routers import users, employees
+from database import init_db, test_connection, AsyncSessionLocal
+from admission import controller as admission_controller
+from routers import users, employees, events, jobs, directory as directory_router
+from change_feed import feed as change_feed, latest_event_id
+from jobs import runner as job_runner
+from directory import directory
+from snapshot import snapshot_cache
 
 # Load environment variables
 load_dotenv()
@@ -25,10 +30,26 @@ async def lifespan(app: FastAPI):
     
     # Initialize database tables
     await init_db()
+    
+    # Build the typeahead index, then keep it current from the change feed
+    # Note the feed position first: writes committed while building are replayed into it
+    async with AsyncSessionLocal() as db:
+        feed_position = await latest_event_id(db)
+        await directory.build(db)
+    change_feed.add_listener(directory.apply_event)
+    change_feed.add_listener(snapshot_cache.invalidate)
+    
+    # Start fanning out change notifications to /api/v1/events subscribers
+    await change_feed.start(after_id=feed_position)
+    
+    # Start background workers for bulk jobs (resumes jobs interrupted by a restart)
+    await job_runner.start()
     print("✅ Application startup complete!")
     
     yield
     
+    await job_runner.stop()
+    await change_feed.stop()
     print("🛑 Application shutdown")
 
 app = FastAPI(
@@ -50,6 +71,9 @@ app.add_middleware(
 # Include routers
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(employees.router, prefix="/api/v1/employees", tags=["Employees"])
+app.include_router(events.router, prefix="/api/v1/events", tags=["Events"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
+app.include_router(directory_router.router, prefix="/api/v1/directory", tags=["Directory"])
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -78,6 +102,11 @@ async def health_check():
             "error": str(e)
         }
 
+@app.get("/health/admission", tags=["Health"])
+async def admission_metrics():
+    """Admission control queue depth, in-flight requests and rejection counters"""
+    return admission_controller.snapshot()
+
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
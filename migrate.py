@@ -0,0 +1,59 @@
+"""
+One-off schema migration: creates new tables and any index declared on the
+models that an existing table is missing.
+
+Indexes are built with CREATE INDEX CONCURRENTLY so populated tables stay
+writable while they build. Run it once per deploy, before starting the API:
+
+Usage: python migrate.py
+"""
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from database import engine, Base
+import models  # noqa: F401  (registers the tables on Base.metadata)
+
+INDEX_STATE = text("""
+    SELECT i.indisvalid
+    FROM pg_class c
+    JOIN pg_index i ON i.indexrelid = c.oid
+    WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace
+""")
+
+def create_index_concurrently_sql(index) -> str:
+    options = index.dialect_options["postgresql"]
+    options["concurrently"] = True
+    try:
+        return str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+    finally:
+        options["concurrently"] = False
+
+async def migrate():
+    # CONCURRENTLY cannot run inside a transaction block
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        # Trigram indexes back the ILIKE '%...%' filters and searches
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.create_all)
+
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                state = (await conn.execute(INDEX_STATE, {"name": index.name})).scalar()
+                if state is True:
+                    continue
+                if state is False:
+                    # Left behind by an interrupted concurrent build
+                    print(f"♻️ Rebuilding invalid index {index.name}")
+                    await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                print(f"🔨 Creating index {index.name} on {table.name}")
+                await conn.execute(text(create_index_concurrently_sql(index)))
+
+    await engine.dispose()
+    print("✅ Migration complete!")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -16,8 +16,40 @@ class EmployeeStatus(str, Enum):
     TERMINATED = "terminated"
     ON_LEAVE = "on_leave"
 
+class ChangeAction(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class JobOperation(str, Enum):
+    SET_STATUS = "set_status"
+    TRANSFER_DEPARTMENT = "transfer_department"
+    REASSIGN_MANAGER = "reassign_manager"
+    DELETE_EMPLOYEES = "delete_employees"
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Default list ordering, and role/active filters combined with it
+        Index("ix_users_created_at", "created_at"),
+        Index("ix_users_role_created_at", "role", "created_at"),
+        Index("ix_users_is_active_created_at", "is_active", "created_at"),
+        # search= runs ILIKE '%...%' over these columns, which needs trigrams
+        *(
+            Index(
+                f"ix_users_{column}_trgm", column,
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+            )
+            for column in ("username", "email", "first_name", "last_name")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -37,10 +69,24 @@ class User(Base):
 
 class Employee(Base):
     __tablename__ = "employees"
+    __table_args__ = (
+        # Default list ordering, and status/manager filters combined with it
+        Index("ix_employees_created_at", "created_at"),
+        Index("ix_employees_status_created_at", "status", "created_at"),
+        Index("ix_employees_manager_id_created_at", "manager_id", "created_at"),
+        # Partial-match filters (department=, search=) use ILIKE '%...%', which needs trigrams
+        *(
+            Index(
+                f"ix_employees_{column}_trgm", column,
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+            )
+            for column in ("employee_id", "department", "position")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(String(20), unique=True, index=True, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     department = Column(String(100), nullable=False)
     position = Column(String(100), nullable=False)
     salary = Column(Integer, nullable=True)  # Store as cents to avoid float precision issues
@@ -58,3 +104,48 @@ class Employee(Base):
 
     def __repr__(self):
         return f"<Employee(id={self.id}, employee_id='{self.employee_id}', department='{self.department}')>"
+
+class ChangeEvent(Base):
+    """Append-only log of writes, published to the change feed"""
+    __tablename__ = "change_events"
+    __table_args__ = (
+        Index("ix_change_events_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    resource = Column(String(20), nullable=False)  # "user" or "employee"
+    action = Column(String(10), nullable=False)
+    resource_id = Column(Integer, nullable=False)
+    department = Column(String(100), nullable=True)
+    manager_id = Column(Integer, nullable=True)
+    data = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ChangeEvent(id={self.id}, resource='{self.resource}', action='{self.action}')>"
+
+class Job(Base):
+    """Bulk operation processed in chunks by the background job runner"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim queued jobs and reclaim running ones with a stale heartbeat
+        Index("ix_jobs_status_heartbeat_at", "status", "heartbeat_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    operation = Column(String(30), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), default=JobStatus.QUEUED, nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    cursor = Column(Integer, nullable=False, default=0)  # Last Employee.id handled; jobs resume after it
+    errors = Column(JSON, nullable=False, default=list)
+    worker_id = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, operation='{self.operation}', status='{self.status}')>"
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_
+from typing import List
+
+from database import get_db
+from admission import controller, PRIORITY_HIGH
+from models import User, Employee
+from schemas import DirectorySuggestion
+from directory import directory
+
+router = APIRouter()
+
+@router.get("/suggest", response_model=List[DirectorySuggestion])
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix of a username, name, email, employee ID or department"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Typeahead suggestions for people pickers, served from the in-memory directory index"""
+    if directory.ready:
+        return directory.suggest(q, limit)
+
+    # Index disabled (directory too large): fall back to a prefix query, admitted like other reads
+    await controller.acquire("directory_suggest", PRIORITY_HIGH)
+    try:
+        prefix = f"{q}%"
+        result = await db.execute(
+            select(
+                User.id.label("user_id"), User.username, User.email, User.first_name, User.last_name,
+                User.is_active, Employee.id.label("employee"), Employee.employee_id, Employee.department,
+            )
+            .outerjoin(Employee, Employee.user_id == User.id)
+            .where(or_(
+                User.username.ilike(prefix),
+                User.email.ilike(prefix),
+                User.first_name.ilike(prefix),
+                User.last_name.ilike(prefix),
+                Employee.employee_id.ilike(prefix),
+                Employee.department.ilike(prefix),
+            ))
+            .order_by(User.is_active.desc(), User.username)
+            .limit(limit)
+        )
+        return [dict(row) for row in result.mappings().all()]
+    finally:
+        controller.release("directory_suggest")
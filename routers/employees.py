@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_, desc, asc
 from sqlalchemy.orm import selectinload
@@ -6,7 +6,11 @@ from typing import List, Optional
 import math
 
 from database import get_db
-from models import Employee, User
+from admission import admit, PRIORITY_HIGH, LIST_MAX_CONCURRENCY
+from models import Employee, User, ChangeAction
+from change_feed import record_event
+from directory import directory, employee_fields
+from snapshot import snapshot_cache
 from schemas import (
     EmployeeCreate, EmployeeUpdate, EmployeeResponse, 
     PaginatedResponse, EmployeeFilters
@@ -14,7 +18,10 @@ from schemas import (
 
 router = APIRouter()
 
-@router.post("/", response_model=EmployeeResponse, status_code=201)
+@router.post(
+    "/", response_model=EmployeeResponse, status_code=201,
+    dependencies=[Depends(admit("create_employee"))]
+)
 async def create_employee(
     employee_data: EmployeeCreate,
     db: AsyncSession = Depends(get_db)
@@ -49,8 +56,16 @@ async def create_employee(
     # Create new employee
     db_employee = Employee(**employee_data.model_dump())
     db.add(db_employee)
+    await db.flush()
+    await record_event(
+        db, "employee", ChangeAction.CREATED, db_employee.id,
+        data=employee_data.model_dump(mode="json"),
+        department=db_employee.department, manager_id=db_employee.manager_id
+    )
     await db.commit()
+    snapshot_cache.invalidate()
     await db.refresh(db_employee)
+    directory.upsert_employee(db_employee.id, **employee_fields(db_employee))
     
     # Load the user relationship
     result = await db.execute(
@@ -60,7 +75,61 @@ async def create_employee(
     
     return employee_with_user
 
-@router.get("/", response_model=PaginatedResponse)
+def build_employees_query(
+    department: Optional[str] = None,
+    position: Optional[str] = None,
+    status: Optional[str] = None,
+    manager_id: Optional[int] = None,
+    search: Optional[str] = None,
+    order_by: str = "created_at",
+    order_desc: bool = False
+):
+    """
+    List query and count query issued by get_employees (before pagination).
+    Also used by the query-plan tests in tests/.
+    """
+    # Build base query with user relationship
+    query = select(Employee).options(selectinload(Employee.user))
+    
+    # Apply filters
+    if department:
+        query = query.where(Employee.department.ilike(f"%{department}%"))
+    if position:
+        query = query.where(Employee.position.ilike(f"%{position}%"))
+    if status:
+        query = query.where(Employee.status == status)
+    if manager_id is not None:
+        query = query.where(Employee.manager_id == manager_id)
+    
+    # Apply search
+    if search:
+        search_filter = or_(
+            Employee.employee_id.ilike(f"%{search}%"),
+            Employee.department.ilike(f"%{search}%"),
+            Employee.position.ilike(f"%{search}%")
+        )
+        query = query.where(search_filter)
+    
+    # Count before ordering; ORDER BY is irrelevant to the total
+    count_query = select(func.count()).select_from(query.subquery())
+    
+    # Apply ordering
+    if hasattr(Employee, order_by):
+        order_column = getattr(Employee, order_by)
+        if order_desc:
+            query = query.order_by(desc(order_column))
+        else:
+            query = query.order_by(asc(order_column))
+    else:
+        # Default ordering if specified column doesn't exist
+        query = query.order_by(desc(Employee.created_at))
+    
+    return query, count_query
+
+@router.get(
+    "/", response_model=PaginatedResponse,
+    dependencies=[Depends(admit("get_employees", heavy_params=("search",), max_concurrency=LIST_MAX_CONCURRENCY))]
+)
 async def get_employees(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
@@ -75,44 +144,14 @@ async def get_employees(
 ):
     """Get paginated list of employees with filtering, searching, and ordering"""
     try:
-        # Build base query with user relationship
-        query = select(Employee).options(selectinload(Employee.user))
-        
-        # Apply filters
-        if department:
-            query = query.where(Employee.department.ilike(f"%{department}%"))
-        if position:
-            query = query.where(Employee.position.ilike(f"%{position}%"))
-        if status:
-            query = query.where(Employee.status == status)
-        if manager_id is not None:
-            query = query.where(Employee.manager_id == manager_id)
-        
-        # Apply search
-        if search:
-            search_filter = or_(
-                Employee.employee_id.ilike(f"%{search}%"),
-                Employee.department.ilike(f"%{search}%"),
-                Employee.position.ilike(f"%{search}%")
-            )
-            query = query.where(search_filter)
+        query, count_query = build_employees_query(
+            department, position, status, manager_id, search, order_by, order_desc
+        )
         
         # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
         total_result = await db.execute(count_query)
         total = total_result.scalar()
         
-        # Apply ordering
-        if hasattr(Employee, order_by):
-            order_column = getattr(Employee, order_by)
-            if order_desc:
-                query = query.order_by(desc(order_column))
-            else:
-                query = query.order_by(asc(order_column))
-        else:
-            # Default ordering if specified column doesn't exist
-            query = query.order_by(desc(Employee.created_at))
-        
         # Apply pagination
         offset = (page - 1) * size
         query = query.offset(offset).limit(size)
@@ -138,7 +177,36 @@ async def get_employees(
             detail=f"An error occurred while fetching employees: {str(e)}"
         )
 
-@router.get("/{employee_id}", response_model=EmployeeResponse)
+@router.get("/snapshot")
+async def get_employees_snapshot(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    All employees with manager IDs and user names as compact columnar JSON.
+
+    Text columns with few distinct values (department, position, status) are
+    sent as a dictionary plus per-row codes. The payload is cached until an
+    employee or user changes, and only one request rebuilds it at a time; send
+    the ETag back in If-None-Match to get 304. Cache hits and 304s skip
+    admission control; only the rebuild is admitted, like other reads.
+    """
+    snapshot = await snapshot_cache.get(db)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=snapshot.gzipped, media_type="application/json",
+            headers={**headers, "Content-Encoding": "gzip"}
+        )
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@router.get(
+    "/{employee_id}", response_model=EmployeeResponse,
+    dependencies=[Depends(admit("get_employee", priority=PRIORITY_HIGH))]
+)
 async def get_employee(
     employee_id: int,
     db: AsyncSession = Depends(get_db)
@@ -154,7 +222,10 @@ async def get_employee(
     
     return employee
 
-@router.put("/{employee_id}", response_model=EmployeeResponse)
+@router.put(
+    "/{employee_id}", response_model=EmployeeResponse,
+    dependencies=[Depends(admit("update_employee"))]
+)
 async def update_employee(
     employee_id: int,
     employee_data: EmployeeUpdate,
@@ -184,16 +255,33 @@ async def update_employee(
                 detail="Employee ID already exists"
             )
     
+    # Keep the old scope so change feed subscribers see employees moving out of it
+    previous = {
+        field: getattr(employee, field)
+        for field in ("department", "manager_id")
+        if field in update_data and update_data[field] != getattr(employee, field)
+    }
+    
     # Update employee fields
     for field, value in update_data.items():
         setattr(employee, field, value)
     
+    await record_event(
+        db, "employee", ChangeAction.UPDATED, employee.id,
+        data={"changes": employee_data.model_dump(mode="json", exclude_unset=True), "previous": previous},
+        department=employee.department, manager_id=employee.manager_id
+    )
     await db.commit()
+    snapshot_cache.invalidate()
     await db.refresh(employee)
+    directory.upsert_employee(employee.id, **employee_fields(employee))
     
     return employee
 
-@router.delete("/{employee_id}", status_code=204)
+@router.delete(
+    "/{employee_id}", status_code=204,
+    dependencies=[Depends(admit("delete_employee"))]
+)
 async def delete_employee(
     employee_id: int,
     db: AsyncSession = Depends(get_db)
@@ -206,11 +294,20 @@ async def delete_employee(
         raise HTTPException(status_code=404, detail="Employee not found")
     
     await db.delete(employee)
+    await record_event(
+        db, "employee", ChangeAction.DELETED, employee.id,
+        department=employee.department, manager_id=employee.manager_id
+    )
     await db.commit()
+    snapshot_cache.invalidate()
+    directory.remove_employee(employee_id)
     
     return None
 
-@router.get("/{employee_id}/subordinates", response_model=List[EmployeeResponse])
+@router.get(
+    "/{employee_id}/subordinates", response_model=List[EmployeeResponse],
+    dependencies=[Depends(admit("get_employee_subordinates", priority=PRIORITY_HIGH))]
+)
 async def get_employee_subordinates(
     employee_id: int,
     db: AsyncSession = Depends(get_db)
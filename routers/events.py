@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+
+from database import AsyncSessionLocal
+from change_feed import feed, event_matches, load_events_since
+
+router = APIRouter()
+
+KEEPALIVE_SECONDS = 15
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['resource']}.{event['action']}\ndata: {json.dumps(event)}\n\n"
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    department: Optional[str] = Query(None, description="Only events for this department (partial match)"),
+    manager_id: Optional[int] = Query(None, description="Only events for employees reporting to this manager"),
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-sent events stream of user and employee creates, updates and deletes.
+
+    Reconnecting clients resume from ``Last-Event-ID`` (sent automatically by
+    EventSource) or ``last_event_id``. If the gap can no longer be replayed a
+    ``reset`` event is sent and the client should reload its lists.
+    """
+    resume_from = last_event_id
+    if resume_from is None and last_event_id_header and last_event_id_header.isdigit():
+        resume_from = int(last_event_id_header)
+
+    # Subscribe before replaying so nothing committed in between is missed
+    subscription = feed.subscribe()
+
+    replay = []
+    if resume_from is not None:
+        # Short-lived session: the stream itself must not hold a pooled connection
+        async with AsyncSessionLocal() as db:
+            replay = await load_events_since(db, resume_from)
+
+    async def event_stream():
+        try:
+            if replay is None:
+                yield "event: reset\ndata: {}\n\n"
+                replayed = set()
+            else:
+                replayed = {event["id"] for event in replay}
+                for event in replay:
+                    if event_matches(event, department, manager_id):
+                        yield format_sse(event)
+
+            while True:
+                if await request.is_disconnected() or subscription.overflowed:
+                    break
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event["id"] in replayed or not event_matches(event, department, manager_id):
+                    continue
+                yield format_sse(event)
+        finally:
+            feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, desc
+from typing import List, Optional
+
+from database import get_db
+from admission import admit, PRIORITY_HIGH
+from models import Employee, Job, JobStatus, JobOperation
+from schemas import JobCreate, JobResponse
+from jobs import runner, target_filters, manager_chain, job_progress
+
+router = APIRouter()
+
+def to_response(job: Job) -> JobResponse:
+    return JobResponse.model_validate(job).model_copy(update=job_progress(job))
+
+@router.post(
+    "/", response_model=JobResponse, status_code=202,
+    dependencies=[Depends(admit("create_job"))]
+)
+async def create_job(
+    job_data: JobCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Submit a bulk operation on employees; poll the returned job for progress"""
+    conditions = target_filters(job_data.target.model_dump())
+    if not conditions:
+        raise HTTPException(
+            status_code=400,
+            detail="Job target must include at least one filter"
+        )
+
+    # Check the operation's own parameters
+    if job_data.operation == JobOperation.SET_STATUS and job_data.new_status is None:
+        raise HTTPException(status_code=400, detail="new_status is required for set_status")
+    if job_data.operation == JobOperation.TRANSFER_DEPARTMENT and not job_data.new_department:
+        raise HTTPException(status_code=400, detail="new_department is required for transfer_department")
+    if job_data.operation == JobOperation.REASSIGN_MANAGER:
+        if "new_manager_id" not in job_data.model_fields_set:
+            raise HTTPException(status_code=400, detail="new_manager_id is required for reassign_manager")
+        if job_data.new_manager_id is not None:
+            manager_result = await db.execute(select(Employee.id).where(Employee.id == job_data.new_manager_id))
+            if manager_result.scalar_one_or_none() is None:
+                raise HTTPException(status_code=404, detail="Manager not found")
+
+            # Moving a manager's own superior (or themselves) under them would create a cycle
+            chain = await manager_chain(db, job_data.new_manager_id)
+            conflicts = await db.execute(
+                select(func.count()).select_from(Employee).where(Employee.id.in_(chain), *conditions)
+            )
+            if conflicts.scalar():
+                raise HTTPException(
+                    status_code=400,
+                    detail="New manager reports to an employee in the job target; this would create a management cycle"
+                )
+
+    job = Job(operation=job_data.operation.value, params=job_data.model_dump(mode="json"))
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    runner.notify()
+    return to_response(job)
+
+@router.get(
+    "/", response_model=List[JobResponse],
+    dependencies=[Depends(admit("get_jobs"))]
+)
+async def get_jobs(
+    status: Optional[JobStatus] = Query(None, description="Filter by status"),
+    limit: int = Query(20, ge=1, le=100, description="Number of most recent jobs"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the most recently submitted jobs"""
+    query = select(Job).order_by(desc(Job.id)).limit(limit)
+    if status:
+        query = query.where(Job.status == status)
+    result = await db.execute(query)
+    return [to_response(job) for job in result.scalars().all()]
+
+@router.get(
+    "/{job_id}", response_model=JobResponse,
+    dependencies=[Depends(admit("get_job", priority=PRIORITY_HIGH))]
+)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a job's status, progress, throughput and errors"""
+    result = await db.execute(select(Job).where(Job.id == job_id))
+    job = result.scalar_one_or_none()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return to_response(job)
+
+@router.post(
+    "/{job_id}/cancel", response_model=JobResponse,
+    dependencies=[Depends(admit("cancel_job"))]
+)
+async def cancel_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel a queued or running job; chunks already committed are kept"""
+    result = await db.execute(select(Job).where(Job.id == job_id).with_for_update())
+    job = result.scalar_one_or_none()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+        raise HTTPException(status_code=400, detail=f"Job is already {job.status}")
+
+    job.status = JobStatus.CANCELLED
+    job.finished_at = func.now()
+    await db.commit()
+    await db.refresh(job)
+
+    return to_response(job)
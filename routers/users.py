@@ -5,7 +5,11 @@ from typing import List, Optional
 import math
 
 from database import get_db
-from models import User, Employee
+from admission import admit, PRIORITY_HIGH, LIST_MAX_CONCURRENCY
+from models import User, Employee, ChangeAction
+from change_feed import record_event
+from directory import directory, user_fields
+from snapshot import snapshot_cache
 from schemas import (
     UserCreate, UserUpdate, UserResponse, 
     PaginatedResponse, UserFilters
@@ -13,7 +17,10 @@ from schemas import (
 
 router = APIRouter()
 
-@router.post("/", response_model=UserResponse, status_code=201)
+@router.post(
+    "/", response_model=UserResponse, status_code=201,
+    dependencies=[Depends(admit("create_user"))]
+)
 async def create_user(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db)
@@ -34,12 +41,66 @@ async def create_user(
     # Create new user
     db_user = User(**user_data.model_dump())
     db.add(db_user)
+    await db.flush()
+    # A new user has no employee record yet, so only unfiltered change streams see this event
+    await record_event(db, "user", ChangeAction.CREATED, db_user.id, data=user_data.model_dump(mode="json"))
     await db.commit()
+    snapshot_cache.invalidate()
     await db.refresh(db_user)
+    directory.upsert_user(db_user.id, **user_fields(db_user))
     
     return db_user
 
-@router.get("/", response_model=PaginatedResponse)
+def build_users_query(
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    search: Optional[str] = None,
+    order_by: str = "created_at",
+    order_desc: bool = False
+):
+    """
+    List query and count query issued by get_users (before pagination).
+    Also used by the query-plan tests in tests/.
+    """
+    # Build base query
+    query = select(User)
+    
+    # Apply filters
+    if role:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    
+    # Apply search
+    if search:
+        search_filter = or_(
+            User.username.ilike(f"%{search}%"),
+            User.email.ilike(f"%{search}%"),
+            User.first_name.ilike(f"%{search}%"),
+            User.last_name.ilike(f"%{search}%")
+        )
+        query = query.where(search_filter)
+    
+    # Count before ordering; ORDER BY is irrelevant to the total
+    count_query = select(func.count()).select_from(query.subquery())
+    
+    # Apply ordering
+    if hasattr(User, order_by):
+        order_column = getattr(User, order_by)
+        if order_desc:
+            query = query.order_by(desc(order_column))
+        else:
+            query = query.order_by(asc(order_column))
+    else:
+        # Default ordering if specified column doesn't exist
+        query = query.order_by(desc(User.created_at))
+    
+    return query, count_query
+
+@router.get(
+    "/", response_model=PaginatedResponse,
+    dependencies=[Depends(admit("get_users", heavy_params=("search",), max_concurrency=LIST_MAX_CONCURRENCY))]
+)
 async def get_users(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
@@ -52,41 +113,14 @@ async def get_users(
 ):
     """Get paginated list of users with filtering, searching, and ordering"""
     try:
-        # Build base query
-        query = select(User)
-        
-        # Apply filters
-        if role:
-            query = query.where(User.role == role)
-        if is_active is not None:
-            query = query.where(User.is_active == is_active)
-        
-        # Apply search
-        if search:
-            search_filter = or_(
-                User.username.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-                User.first_name.ilike(f"%{search}%"),
-                User.last_name.ilike(f"%{search}%")
-            )
-            query = query.where(search_filter)
+        query, count_query = build_users_query(
+            role, is_active, search, order_by, order_desc
+        )
         
         # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
         total_result = await db.execute(count_query)
         total = total_result.scalar()
         
-        # Apply ordering
-        if hasattr(User, order_by):
-            order_column = getattr(User, order_by)
-            if order_desc:
-                query = query.order_by(desc(order_column))
-            else:
-                query = query.order_by(asc(order_column))
-        else:
-            # Default ordering if specified column doesn't exist
-            query = query.order_by(desc(User.created_at))
-        
         # Apply pagination
         offset = (page - 1) * size
         query = query.offset(offset).limit(size)
@@ -112,7 +146,10 @@ async def get_users(
             detail=f"An error occurred while fetching users: {str(e)}"
         )
 
-@router.get("/{user_id}", response_model=UserResponse)
+@router.get(
+    "/{user_id}", response_model=UserResponse,
+    dependencies=[Depends(admit("get_user", priority=PRIORITY_HIGH))]
+)
 async def get_user(
     user_id: int,
     db: AsyncSession = Depends(get_db)
@@ -126,7 +163,10 @@ async def get_user(
     
     return user
 
-@router.put("/{user_id}", response_model=UserResponse)
+@router.put(
+    "/{user_id}", response_model=UserResponse,
+    dependencies=[Depends(admit("update_user"))]
+)
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
@@ -161,12 +201,28 @@ async def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
     
+    # Scope the event by the linked employee so department/manager-filtered streams see it
+    employee_result = await db.execute(
+        select(Employee.department, Employee.manager_id).where(Employee.user_id == user_id)
+    )
+    employee_scope = employee_result.one_or_none()
+    await record_event(
+        db, "user", ChangeAction.UPDATED, user.id,
+        data={"changes": user_data.model_dump(mode="json", exclude_unset=True)},
+        department=employee_scope.department if employee_scope else None,
+        manager_id=employee_scope.manager_id if employee_scope else None
+    )
     await db.commit()
+    snapshot_cache.invalidate()
     await db.refresh(user)
+    directory.upsert_user(user.id, **user_fields(user))
     
     return user
 
-@router.delete("/{user_id}", status_code=204)
+@router.delete(
+    "/{user_id}", status_code=204,
+    dependencies=[Depends(admit("delete_user"))]
+)
 async def delete_user(
     user_id: int,
     db: AsyncSession = Depends(get_db)
@@ -184,9 +240,20 @@ async def delete_user(
     employee = employee_result.scalar_one_or_none()
     if employee:
         await db.delete(employee)
+        await record_event(
+            db, "employee", ChangeAction.DELETED, employee.id,
+            department=employee.department, manager_id=employee.manager_id
+        )
     
     # Delete the user
     await db.delete(user)
+    await record_event(
+        db, "user", ChangeAction.DELETED, user.id,
+        department=employee.department if employee else None,
+        manager_id=employee.manager_id if employee else None
+    )
     await db.commit()
+    snapshot_cache.invalidate()
+    directory.remove_user(user_id)
     
     return None
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional, List
 from datetime import datetime
-from models import UserRole, EmployeeStatus
+from models import UserRole, EmployeeStatus, JobStatus, JobOperation
 
 # User Schemas
 class UserBase(BaseModel):
@@ -95,3 +95,49 @@ class EmployeeFilters(BaseModel):
     search: Optional[str] = Field(None, description="Search in employee_id, department, position")
     order_by: Optional[str] = Field("created_at", description="Field to order by")
     order_desc: bool = Field(False, description="Order in descending order")
+
+# Job Schemas
+class JobTarget(BaseModel):
+    """Employees a job applies to; filters are exact matches and are combined"""
+    employee_ids: Optional[List[int]] = None
+    department: Optional[str] = None
+    status: Optional[EmployeeStatus] = None
+    manager_id: Optional[int] = None
+
+class JobCreate(BaseModel):
+    operation: JobOperation
+    target: JobTarget
+    new_status: Optional[EmployeeStatus] = Field(None, description="For set_status")
+    new_department: Optional[str] = Field(None, min_length=1, max_length=100, description="For transfer_department")
+    new_manager_id: Optional[int] = Field(None, description="For reassign_manager; null detaches from any manager")
+    delete_users: bool = Field(False, description="For delete_employees: also delete the linked users")
+
+class JobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    operation: JobOperation
+    params: dict
+    status: JobStatus
+    total: int
+    processed: int
+    failed: int
+    errors: List[dict]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: float = Field(0.0, description="Fraction of target rows handled")
+    rows_per_second: Optional[float] = None
+
+# Directory Schemas
+class DirectorySuggestion(BaseModel):
+    user_id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    is_active: bool
+    employee: Optional[int] = Field(None, description="Employee record ID, if any")
+    employee_id: Optional[str] = None
+    department: Optional[str] = None
+    score: Optional[float] = None
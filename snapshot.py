@@ -0,0 +1,121 @@
+"""
+Compact, cached org-wide snapshot of employees for reporting and the org chart.
+
+Only the needed columns are fetched, as plain rows rather than ORM objects, and
+accumulated column by column. Low-cardinality text columns are
+dictionary-encoded. The encoded JSON (and its gzipped form) is cached until a
+change feed event for an employee or user arrives. NOTIFY is delivered on
+commit, so invalidation follows commit order, and a cache hit runs no query.
+This worker's own write handlers also invalidate right after commit, so a
+client never reads its own write back from a stale cache.
+Only a rebuild goes through admission control, so requests waiting on it or
+served from the cache never hold a slot.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Employee, User
+from change_feed import feed
+from admission import controller, PRIORITY_LOW
+
+# (output name, column); order is the column order of the payload
+SNAPSHOT_COLUMNS = (
+    ("id", Employee.id),
+    ("employee_id", Employee.employee_id),
+    ("user_id", Employee.user_id),
+    ("manager_id", Employee.manager_id),
+    ("department", Employee.department),
+    ("position", Employee.position),
+    ("status", Employee.status),
+    ("username", User.username),
+    ("first_name", User.first_name),
+    ("last_name", User.last_name),
+)
+
+# Repeated values in these columns are sent once, with per-row codes into the dictionary
+DICTIONARY_COLUMNS = {"department", "position", "status"}
+
+
+class Snapshot:
+    def __init__(self, body: bytes, version: str):
+        self.version = version
+        self.etag = f'"{version}"'
+        self.body = body
+        self.gzipped = gzip.compress(body)
+
+
+def encode_columns(rows, names: List[str]) -> Dict[str, Any]:
+    """Transpose rows into columns, dictionary-encoding the repetitive ones"""
+    columns: Dict[str, List[Any]] = {name: [] for name in names}
+    dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in names if name in DICTIONARY_COLUMNS}
+    appenders = [columns[name].append for name in names]
+    for row in rows:
+        for name, append, value in zip(names, appenders, row):
+            dictionary = dictionaries.get(name)
+            if dictionary is not None:
+                value = dictionary.setdefault(value, len(dictionary))
+            append(value)
+
+    encoded: Dict[str, Any] = {}
+    for name in names:
+        if name in dictionaries:
+            encoded[name] = {"dictionary": list(dictionaries[name]), "codes": columns[name]}
+        else:
+            encoded[name] = columns[name]
+    return encoded
+
+
+class SnapshotCache:
+    """Latest encoded snapshot of this worker, dropped on every employee/user change"""
+
+    def __init__(self):
+        self.current: Optional[Snapshot] = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, event: Optional[Dict[str, Any]] = None) -> None:
+        """Change feed listener, also called by the write handlers after commit"""
+        self._generation += 1
+        self.current = None
+
+    async def get(self, db: AsyncSession) -> Snapshot:
+        # Without a live feed we cannot hear about writes, so never trust the cache
+        if self.current and feed.connected:
+            return self.current
+        async with self._lock:
+            # Another request may have rebuilt it while we waited
+            if self.current and feed.connected:
+                return self.current
+            generation = self._generation
+            await controller.acquire("get_employees_snapshot", PRIORITY_LOW)
+            try:
+                snapshot = await self._build(db)
+            finally:
+                controller.release("get_employees_snapshot")
+            # Keep it only if no write was announced while the query ran
+            if generation == self._generation:
+                self.current = snapshot
+            return snapshot
+
+    async def _build(self, db: AsyncSession) -> Snapshot:
+        names = [name for name, _ in SNAPSHOT_COLUMNS]
+        result = await db.execute(
+            select(*(column for _, column in SNAPSHOT_COLUMNS))
+            .join(User, Employee.user_id == User.id)
+            .order_by(Employee.id)
+        )
+        rows = result.all()
+        columns = json.dumps(encode_columns(rows, names), separators=(",", ":"), default=str)
+        # Content hash, so every worker hands out the same ETag for the same data
+        version = hashlib.sha1(columns.encode()).hexdigest()[:16]
+        body = f'{{"version":"{version}","count":{len(rows)},"columns":{columns}}}'.encode()
+        return Snapshot(body, version)
+
+
+snapshot_cache = SnapshotCache()
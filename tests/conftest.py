@@ -0,0 +1,169 @@
+"""
+Fixtures for the database-backed tests.
+
+They need a real PostgreSQL database: set DATABASE_URL (e.g. a local
+``postgresql://postgres@localhost/postgres``); without it the tests are
+skipped. Data goes into throwaway schemas (``query_plan_tests`` for the plan
+tests, ``app_tests`` for the change feed and job tests) that are dropped
+afterwards, so the application's own tables are never touched.
+"""
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+import pytest
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SCHEMA = "query_plan_tests"
+APP_SCHEMA = "app_tests"
+
+# Large enough that the planner stops preferring sequential scans of small tables
+N_ROWS = 20000
+N_MANAGERS = 200
+
+FIRST_NAMES = [f"First{i}" for i in range(40)]
+LAST_NAMES = [f"Last{i}" for i in range(99)] + ["Zimmerman"]
+DEPARTMENTS = [f"Department {i}" for i in range(49)] + ["Payroll"]
+POSITIONS = [f"Position {i}" for i in range(60)]
+ROLES = (["admin"] * 1) + (["manager"] * 5) + (["employee"] * 60) + (["user"] * 34)
+STATUSES = (["active"] * 85) + (["inactive"] * 8) + (["on_leave"] * 5) + (["terminated"] * 2)
+
+
+def sync_url(url: str) -> str:
+    """Plain psycopg2 URL; sslmode and other libpq parameters are kept as they are"""
+    parsed = urlparse(url)
+    return parsed._replace(scheme="postgresql+psycopg2").geturl()
+
+
+@pytest.fixture(scope="session")
+def plan_db():
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+
+    from sqlalchemy import create_engine, insert, text
+    from sqlalchemy.schema import CreateTable
+    from models import User, Employee
+
+    url = sync_url(os.environ["DATABASE_URL"])
+    admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            has_trgm = True
+        except Exception:
+            has_trgm = False
+
+    engine = create_engine(
+        url,
+        isolation_level="AUTOCOMMIT",
+        connect_args={"options": f"-csearch_path={SCHEMA},public"},
+    )
+    rng = random.Random(42)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    try:
+        with engine.connect() as conn:
+            for table in (User.__table__, Employee.__table__):
+                conn.execute(CreateTable(table))
+                for index in table.indexes:
+                    if not has_trgm and index.dialect_options["postgresql"]["using"] == "gin":
+                        continue
+                    index.create(conn)
+
+            users = []
+            for i in range(1, N_ROWS + 1):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                users.append({
+                    "id": i,
+                    "username": f"{first.lower()}.{last.lower()}.{i}",
+                    "email": f"user{i}@example.com",
+                    "first_name": first,
+                    "last_name": last,
+                    "role": rng.choice(ROLES),
+                    "is_active": rng.random() > 0.03,
+                    "created_at": base + timedelta(minutes=rng.randrange(N_ROWS * 10)),
+                })
+            conn.execute(insert(User.__table__), users)
+
+            employees = []
+            for i in range(1, N_ROWS + 1):
+                employees.append({
+                    "id": i,
+                    "employee_id": f"EMP{i:06d}",
+                    "user_id": i,
+                    "department": rng.choice(DEPARTMENTS),
+                    "position": rng.choice(POSITIONS),
+                    "hire_date": base,
+                    "status": rng.choice(STATUSES),
+                    "manager_id": None if i <= N_MANAGERS else rng.randint(1, N_MANAGERS),
+                    "created_at": base + timedelta(minutes=rng.randrange(N_ROWS * 10)),
+                })
+            conn.execute(insert(Employee.__table__), employees)
+
+            # Fresh statistics and visibility map, as on a settled production table
+            conn.execute(text("VACUUM ANALYZE users"))
+            conn.execute(text("VACUUM ANALYZE employees"))
+
+        yield engine, has_trgm
+    finally:
+        engine.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.dispose()
+
+
+class AppDatabase:
+    """Empty application tables in the ``app_tests`` schema, with their own NOTIFY channel"""
+
+    def __init__(self, url: str):
+        from database import prepared_url
+        from change_feed import listen_dsn
+
+        self._url = prepared_url
+        # asyncpg passes unknown DSN parameters on as server settings
+        dsn = listen_dsn(url)
+        self.listen_dsn = f"{dsn}{'&' if '?' in dsn else '?'}search_path={APP_SCHEMA}"
+
+    def engine(self, **kwargs):
+        """Async engine on the test schema; create it inside the running event loop"""
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        return create_async_engine(
+            self._url, connect_args={"server_settings": {"search_path": APP_SCHEMA}}, **kwargs
+        )
+
+
+@pytest.fixture
+def app_db(monkeypatch):
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.schema import CreateTable
+    from database import Base
+    import change_feed
+    import models  # noqa: F401  (registers the tables on Base.metadata)
+
+    # Keep test notifications away from any application listening on the same database
+    monkeypatch.setattr(change_feed, "CHANNEL", "change_feed_tests")
+
+    url = os.environ["DATABASE_URL"]
+    admin = create_engine(sync_url(url), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {APP_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {APP_SCHEMA}"))
+        conn.execute(text(f"SET search_path TO {APP_SCHEMA}"))
+        # Tables without their indexes, which the plan tests cover (and which need pg_trgm)
+        for table in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(table))
+    try:
+        yield AppDatabase(url)
+    finally:
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {APP_SCHEMA} CASCADE"))
+        admin.dispose()
@@ -0,0 +1,194 @@
+"""
+Admission controller: priority queueing, per-route caps and load shedding.
+Pure asyncio, no database needed.
+"""
+import asyncio
+
+import pytest
+
+from admission import (
+    AdmissionController, AdmissionRejected, RouteLimit,
+    PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW,
+)
+
+
+async def settle():
+    """Let queued tasks run up to their next await"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_queued_requests_are_admitted_by_priority_across_routes():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        await controller.acquire("holder")
+        admitted = []
+
+        async def request(route, priority):
+            await controller.acquire(route, priority)
+            admitted.append(route)
+
+        tasks = []
+        for route, priority in (
+            ("list_low", PRIORITY_LOW),
+            ("lookup_high", PRIORITY_HIGH),
+            ("update_normal", PRIORITY_NORMAL),
+            ("lookup_high_later", PRIORITY_HIGH),
+        ):
+            tasks.append(asyncio.create_task(request(route, priority)))
+            await settle()
+        assert admitted == []
+
+        controller.release("holder")
+        for route in ("lookup_high", "lookup_high_later", "update_normal", "list_low"):
+            await settle()
+            assert admitted[-1] == route
+            controller.release(route)
+        await asyncio.gather(*tasks)
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_route_max_concurrency_caps_only_that_route():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=10)
+        controller.configure_route("list", RouteLimit(max_concurrency=2))
+        await controller.acquire("list")
+        await controller.acquire("list")
+
+        third = asyncio.create_task(controller.acquire("list"))
+        await settle()
+        assert not third.done()
+        assert controller.stats["list"].queued == 1
+
+        # Other routes still get the free global slots, even with a list request queued
+        await asyncio.wait_for(controller.acquire("get"), timeout=1)
+        assert not third.done()
+
+        controller.release("list")
+        await asyncio.wait_for(third, timeout=1)
+        assert controller.stats["list"].in_flight == 2
+        assert controller.in_flight == 3
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected_with_429_and_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, retry_after=7)
+        controller.configure_route("list", RouteLimit(max_queue=1))
+        await controller.acquire("list")
+        queued = asyncio.create_task(controller.acquire("list"))
+        await settle()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("list")
+        assert rejected.value.status_code == 429
+        assert rejected.value.headers["Retry-After"] == "7"
+        assert controller.stats["list"].rejected_queue_full == 1
+
+        controller.release("list")
+        await asyncio.wait_for(queued, timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_queue_deadline_is_rejected_with_503_and_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, retry_after=3)
+        controller.configure_route("list", RouteLimit(queue_timeout=0.05))
+        await controller.acquire("holder")
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("list")
+        assert rejected.value.status_code == 503
+        assert rejected.value.headers["Retry-After"] == "3"
+        assert controller.stats["list"].rejected_timeout == 1
+        # The expired waiter is gone and does not take the next free slot
+        assert controller.stats["list"].queued == 0
+        controller.release("holder")
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        await controller.acquire("holder")
+        waiter = asyncio.create_task(controller.acquire("list"))
+        await settle()
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.stats["list"].queued == 0
+
+        controller.release("holder")
+        assert controller.in_flight == 0
+        assert controller.stats["list"].in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_after_being_granted_releases_its_slot():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        await controller.acquire("holder")
+
+        async def request():
+            # As in admit(): whoever returns from acquire() owns the slot
+            await controller.acquire("list")
+            try:
+                await asyncio.sleep(10)
+            finally:
+                controller.release("list")
+
+        waiter = asyncio.create_task(request())
+        await settle()
+
+        # The slot is handed over, but the client goes away before the request resumes
+        controller.release("holder")
+        assert controller.stats["list"].in_flight == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.in_flight == 0
+        assert controller.stats["list"].in_flight == 0
+
+        # The freed slot is usable again
+        await asyncio.wait_for(controller.acquire("get"), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_average_wait_only_counts_admitted_requests():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        controller.configure_route("list", RouteLimit(queue_timeout=0.05))
+
+        # Admitted without waiting
+        await controller.acquire("list")
+        controller.release("list")
+
+        # Waits out its whole deadline and is rejected
+        await controller.acquire("holder")
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("list")
+        controller.release("holder")
+
+        route = controller.snapshot()["routes"]["list"]
+        assert route["admitted"] == 1
+        assert route["rejected_timeout"] == 1
+        assert route["avg_wait_ms"] == 0.0
+
+        # A request that did wait for its slot is counted
+        await controller.acquire("holder")
+        queued = asyncio.create_task(controller.acquire("list"))
+        await asyncio.sleep(0.02)
+        controller.release("holder")
+        await asyncio.wait_for(queued, timeout=1)
+        assert controller.snapshot()["routes"]["list"]["avg_wait_ms"] >= 5
+
+    asyncio.run(scenario())
@@ -0,0 +1,260 @@
+"""
+Change feed against a real PostgreSQL: events recorded in a transaction are
+delivered to subscribers over LISTEN/NOTIFY once it commits, and clients
+resume from the table or are told to reset.
+"""
+import asyncio
+import os
+
+import pytest
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import change_feed
+from change_feed import ChangeFeed, event_matches, load_events_since, record_event, record_events
+from models import ChangeAction, ChangeEvent
+
+DELIVERY_TIMEOUT = 5.0
+
+
+async def started_feed(app_db, after_id=None) -> ChangeFeed:
+    feed = ChangeFeed(app_db.listen_dsn)
+    await feed.start(after_id=after_id)
+    for _ in range(int(DELIVERY_TIMEOUT / 0.05)):
+        if feed.connected:
+            return feed
+        await asyncio.sleep(0.05)
+    await feed.stop()
+    pytest.fail("Change feed did not connect")
+
+
+async def receive(subscription, count: int) -> list:
+    return [
+        await asyncio.wait_for(subscription.queue.get(), timeout=DELIVERY_TIMEOUT)
+        for _ in range(count)
+    ]
+
+
+def employee_event(employee_id: int, **fields) -> ChangeEvent:
+    return ChangeEvent(
+        resource="employee", action=ChangeAction.UPDATED.value, resource_id=employee_id, data={}, **fields
+    )
+
+
+def test_committed_event_reaches_subscribers_and_listeners(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        feed = await started_feed(app_db)
+        heard = []
+        feed.add_listener(heard.append)
+        subscription = feed.subscribe()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                event = await record_event(
+                    db, "employee", ChangeAction.UPDATED, 7,
+                    data={"changes": {"department": "Sales"}, "previous": {"department": "Support"}},
+                    department="Sales", manager_id=3,
+                )
+                await db.commit()
+
+            [received] = await receive(subscription, 1)
+            assert received["id"] == event.id
+            assert received["resource"] == "employee"
+            assert received["action"] == "updated"
+            assert received["resource_id"] == 7
+            assert received["department"] == "Sales"
+            assert received["manager_id"] == 3
+            assert received["data"]["previous"] == {"department": "Support"}
+            assert heard == [received]
+        finally:
+            await feed.stop()
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_rolled_back_event_is_not_delivered(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        feed = await started_feed(app_db)
+        subscription = feed.subscribe()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                await record_event(db, "user", ChangeAction.CREATED, 1)
+                await db.rollback()
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                committed = await record_event(db, "user", ChangeAction.CREATED, 2)
+                await db.commit()
+
+            [received] = await receive(subscription, 1)
+            assert received["id"] == committed.id
+            assert subscription.queue.empty()
+        finally:
+            await feed.stop()
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_bulk_events_are_delivered_in_id_order(app_db, monkeypatch):
+    # Several NOTIFY payloads for one transaction
+    monkeypatch.setattr(change_feed, "NOTIFY_BATCH_SIZE", 2)
+
+    async def scenario():
+        engine = app_db.engine()
+        feed = await started_feed(app_db)
+        subscription = feed.subscribe()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                events = [employee_event(employee_id) for employee_id in range(1, 6)]
+                await record_events(db, events)
+                await db.commit()
+
+            received = await receive(subscription, 5)
+            assert [event["id"] for event in received] == [event.id for event in events]
+            assert [event["resource_id"] for event in received] == [1, 2, 3, 4, 5]
+        finally:
+            await feed.stop()
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_start_replays_events_after_the_given_id(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                first = await record_event(db, "employee", ChangeAction.UPDATED, 1)
+                second = await record_event(db, "employee", ChangeAction.UPDATED, 2)
+                await db.commit()
+
+            # As at startup: a cache built from the state after `first` must still see `second`
+            heard = []
+            feed = ChangeFeed(app_db.listen_dsn)
+            feed.add_listener(heard.append)
+            await feed.start(after_id=first.id)
+            try:
+                for _ in range(int(DELIVERY_TIMEOUT / 0.05)):
+                    if feed.connected:
+                        break
+                    await asyncio.sleep(0.05)
+                assert [event["id"] for event in heard] == [second.id]
+            finally:
+                await feed.stop()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_load_events_since_resumes_after_last_event_id(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                events = [employee_event(employee_id) for employee_id in range(1, 4)]
+                await record_events(db, events)
+                await db.commit()
+                ids = [event.id for event in events]
+
+                replay = await load_events_since(db, ids[0])
+                assert [event["id"] for event in replay] == ids[1:]
+                assert await load_events_since(db, ids[-1]) == []
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_load_events_since_resets_clients_behind_pruned_events(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                events = [employee_event(employee_id) for employee_id in range(1, 4)]
+                await record_events(db, events)
+                await db.commit()
+                ids = [event.id for event in events]
+
+                await db.execute(delete(ChangeEvent).where(ChangeEvent.id <= ids[1]))
+                await db.commit()
+                assert await load_events_since(db, ids[0] - 1) is None
+                assert [event["id"] for event in await load_events_since(db, ids[1])] == [ids[2]]
+
+                # Pruned empty: only a client that saw the last issued id is current
+                await db.execute(delete(ChangeEvent))
+                await db.commit()
+                assert await load_events_since(db, ids[1]) is None
+                assert await load_events_since(db, ids[2]) == []
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_load_events_since_resets_clients_too_far_behind(app_db, monkeypatch):
+    monkeypatch.setattr(change_feed, "REPLAY_LIMIT", 2)
+
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                events = [employee_event(employee_id) for employee_id in range(1, 4)]
+                await record_events(db, events)
+                await db.commit()
+
+                assert await load_events_since(db, events[0].id - 1) is None
+                assert len(await load_events_since(db, events[0].id)) == 2
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def serialized(department=None, manager_id=None, previous=None) -> dict:
+    return {
+        "id": 1, "resource": "employee", "action": "updated", "resource_id": 10,
+        "department": department, "manager_id": manager_id,
+        "data": {"changes": {}, "previous": previous or {}},
+    }
+
+
+def test_event_matches_current_scope():
+    event = serialized(department="Engineering", manager_id=4)
+    assert event_matches(event, None, None)
+    assert event_matches(event, "engineer", None)
+    assert event_matches(event, None, 4)
+    assert event_matches(event, "Engineering", 4)
+    assert not event_matches(event, "Sales", None)
+    assert not event_matches(event, None, 5)
+    assert not event_matches(event, "Engineering", 5)
+
+
+def test_event_matches_previous_scope():
+    # Moved from Sales under manager 4 to Engineering under manager 9
+    event = serialized(
+        department="Engineering", manager_id=9, previous={"department": "Sales", "manager_id": 4}
+    )
+    assert event_matches(event, "sales", None)
+    assert event_matches(event, None, 4)
+    assert event_matches(event, "engineering", 9)
+    assert not event_matches(event, "Support", None)
+    assert not event_matches(event, None, 7)
+
+
+def test_event_matches_without_scope():
+    # e.g. a user created before it has an employee record
+    event = {"id": 1, "resource": "user", "action": "created", "resource_id": 3,
+             "department": None, "manager_id": None, "data": {}}
+    assert event_matches(event, None, None)
+    assert not event_matches(event, "Sales", None)
+    assert not event_matches(event, None, 4)
@@ -0,0 +1,249 @@
+"""
+Background jobs against a real PostgreSQL: chunked processing, row-by-row
+retry of failing chunks, the management-cycle guard, detaching reports when
+deleting employees, and resuming a job whose worker stopped heartbeating.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import jobs
+from jobs import JobRunner, WORKER_ID, JOB_LEASE_SECONDS
+from models import Employee, User, Job, JobStatus, JobOperation, ChangeEvent
+
+HIRE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def job_params(operation: JobOperation, target: dict, **params) -> dict:
+    """Job.params as stored by POST /api/v1/jobs"""
+    return {
+        "operation": operation.value,
+        "target": {"employee_ids": None, "department": None, "status": None, "manager_id": None, **target},
+        "new_status": None,
+        "new_department": None,
+        "new_manager_id": None,
+        "delete_users": False,
+        **params,
+    }
+
+
+async def seed(db: AsyncSession, managers: dict) -> None:
+    """Users and employees 1..n, employee id -> manager id; managers must come first"""
+    for employee_id, manager_id in managers.items():
+        db.add(User(
+            id=employee_id, username=f"user{employee_id}", email=f"user{employee_id}@example.com",
+            first_name="First", last_name=f"Last{employee_id}",
+        ))
+        await db.flush()
+        db.add(Employee(
+            id=employee_id, employee_id=f"EMP{employee_id:04d}", user_id=employee_id,
+            department="Support", position="Agent", hire_date=HIRE_DATE, status="active",
+            manager_id=manager_id,
+        ))
+        await db.flush()
+    await db.commit()
+
+
+async def submit(db: AsyncSession, operation: JobOperation, target: dict, **params) -> int:
+    job = Job(operation=operation.value, params=job_params(operation, target, **params))
+    db.add(job)
+    await db.commit()
+    return job.id
+
+
+def job_runner(engine) -> JobRunner:
+    # Workers are driven directly, without start()'s own engine and polling tasks
+    runner = JobRunner(workers=1)
+    runner.session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return runner
+
+
+async def run_next(runner: JobRunner) -> int:
+    job_id = await runner._claim()
+    assert job_id is not None
+    await runner._run(job_id)
+    return job_id
+
+
+async def load(db: AsyncSession, model, **filters) -> list:
+    result = await db.execute(select(model).filter_by(**filters).order_by(model.id))
+    return list(result.scalars().all())
+
+
+def test_job_processes_targets_in_chunks(app_db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_CHUNK_SIZE", 2)
+    chunks = []
+    apply_operation = jobs.apply_operation
+
+    async def recording_apply(db, job, rows):
+        chunks.append([row.id for row in rows])
+        await apply_operation(db, job, rows)
+
+    monkeypatch.setattr(jobs, "apply_operation", recording_apply)
+
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                await seed(db, {1: None, 2: 1, 3: 1, 4: 1, 5: 1})
+                job_id = await submit(db, JobOperation.SET_STATUS, {"department": "Support"}, new_status="terminated")
+
+            await run_next(job_runner(engine))
+
+            async with AsyncSession(engine) as db:
+                job = await db.get(Job, job_id)
+                assert job.status == JobStatus.COMPLETED
+                assert (job.total, job.processed, job.failed, job.cursor) == (5, 5, 0, 5)
+                assert {e.status for e in await load(db, Employee)} == {"terminated"}
+                events = await load(db, ChangeEvent)
+                assert [e.resource_id for e in events] == [1, 2, 3, 4, 5]
+            assert chunks == [[1, 2], [3, 4], [5]]
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_failing_chunk_is_retried_row_by_row(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                # 3 reports to 2, which reports to 1
+                await seed(db, {1: None, 2: 1, 3: 2, 4: None, 5: None})
+                # Moving 1 under 3 would close a cycle; 4 and 5 are fine
+                job_id = await submit(
+                    db, JobOperation.REASSIGN_MANAGER, {"employee_ids": [1, 4, 5]}, new_manager_id=3
+                )
+
+            await run_next(job_runner(engine))
+
+            async with AsyncSession(engine) as db:
+                job = await db.get(Job, job_id)
+                assert job.status == JobStatus.COMPLETED
+                assert (job.processed, job.failed) == (2, 1)
+                assert [error["employee_id"] for error in job.errors] == [1]
+                assert "cycle" in job.errors[0]["error"]
+                managers = {e.id: e.manager_id for e in await load(db, Employee)}
+                assert managers == {1: None, 2: 1, 3: 2, 4: 3, 5: 3}
+                # Only the rows that were applied have events
+                assert [e.resource_id for e in await load(db, ChangeEvent)] == [4, 5]
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_job_where_every_row_fails_is_failed(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                await seed(db, {1: None, 2: 1})
+                job_id = await submit(db, JobOperation.REASSIGN_MANAGER, {"employee_ids": [1]}, new_manager_id=2)
+
+            await run_next(job_runner(engine))
+
+            async with AsyncSession(engine) as db:
+                job = await db.get(Job, job_id)
+                assert job.status == JobStatus.FAILED
+                assert (job.processed, job.failed) == (0, 1)
+                assert (await db.get(Employee, 1)).manager_id is None
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_delete_employees_detaches_their_reports(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                await seed(db, {1: None, 2: 1, 3: 2, 4: 2})
+                job_id = await submit(
+                    db, JobOperation.DELETE_EMPLOYEES, {"employee_ids": [2]}, delete_users=True
+                )
+
+            await run_next(job_runner(engine))
+
+            async with AsyncSession(engine) as db:
+                job = await db.get(Job, job_id)
+                assert job.status == JobStatus.COMPLETED
+                assert job.processed == 1
+                managers = {e.id: e.manager_id for e in await load(db, Employee)}
+                assert managers == {1: None, 3: None, 4: None}
+                assert [u.id for u in await load(db, User)] == [1, 3, 4]
+
+                events = {(e.resource, e.action, e.resource_id): e for e in await load(db, ChangeEvent)}
+                assert set(events) == {
+                    ("employee", "updated", 3), ("employee", "updated", 4),
+                    ("employee", "deleted", 2), ("user", "deleted", 2),
+                }
+                # Detached reports keep their old manager, so that manager's subscribers see them leave
+                for report in (3, 4):
+                    event = events[("employee", "updated", report)]
+                    assert event.manager_id == 2
+                    assert event.data == {"changes": {"manager_id": None}, "previous": {"manager_id": 2}}
+                assert events[("employee", "deleted", 2)].manager_id == 1
+                assert events[("user", "deleted", 2)].manager_id == 1
+                assert events[("user", "deleted", 2)].department == "Support"
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_job_with_stale_heartbeat_resumes_after_its_cursor(app_db):
+    async def scenario():
+        engine = app_db.engine()
+        now = datetime.now(timezone.utc)
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                await seed(db, {1: None, 2: 1, 3: 1, 4: 1})
+                params = job_params(JobOperation.TRANSFER_DEPARTMENT, {"manager_id": 1}, new_department="Sales")
+                # Still heartbeating on another worker: must be left alone
+                live = Job(
+                    operation=JobOperation.TRANSFER_DEPARTMENT.value, params=params,
+                    status=JobStatus.RUNNING.value, total=3, worker_id="other:1", heartbeat_at=now,
+                    started_at=now,
+                )
+                # Its worker died after committing the chunk that ended at employee 2
+                stale = Job(
+                    operation=JobOperation.TRANSFER_DEPARTMENT.value, params=params,
+                    status=JobStatus.RUNNING.value, total=3, processed=1, cursor=2, worker_id="crashed:1",
+                    heartbeat_at=now - timedelta(seconds=JOB_LEASE_SECONDS + 5), started_at=now,
+                )
+                db.add_all([live, stale])
+                await db.commit()
+
+            runner = job_runner(engine)
+            assert await run_next(runner) == stale.id
+            assert await runner._claim() is None
+
+            async with AsyncSession(engine) as db:
+                job = await db.get(Job, stale.id)
+                assert job.status == JobStatus.COMPLETED
+                assert job.worker_id == WORKER_ID
+                assert (job.total, job.processed, job.cursor) == (3, 3, 4)
+                departments = {e.id: e.department for e in await load(db, Employee)}
+                # Rows up to the cursor are not processed again
+                assert departments == {1: "Support", 2: "Support", 3: "Sales", 4: "Sales"}
+                assert (await db.get(Job, live.id)).worker_id == "other:1"
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+"""
+EXPLAIN the queries the routers issue against seeded data and check that none
+of them falls back to a sequential scan of ``employees`` or ``users``.
+"""
+import json
+import os
+
+import pytest
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import selectinload
+
+from models import Employee
+from routers.employees import build_employees_query
+from routers.users import build_users_query
+
+HOT_TABLES = {"employees", "users"}
+
+# Filters mirror the query parameters of GET /api/v1/employees and /api/v1/users,
+# always with the default created_at ordering
+EMPLOYEE_LISTS = {
+    "status": dict(status="terminated"),
+    "manager_id": dict(manager_id=17),
+    "department": dict(department="payroll"),
+    "search": dict(search="payroll"),
+}
+USER_LISTS = {
+    "role": dict(role="admin"),
+    "is_active": dict(is_active=False),
+    "search": dict(search="zimmerman"),
+}
+TRIGRAM_FILTERS = {"department", "search"}
+
+
+def seq_scans(plan: dict) -> list:
+    """Relations read with a Seq Scan anywhere in a JSON plan"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def assert_uses_index(engine, statement):
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = seq_scans(plan[0]["Plan"])
+        if scans:
+            readable = "\n".join(conn.execute(text(f"EXPLAIN {sql}")).scalars())
+            pytest.fail(f"Sequential scan on {', '.join(scans)}:\n{sql}\n\n{readable}")
+
+
+def skip_without_trgm(has_trgm: bool, name: str):
+    if name in TRIGRAM_FILTERS and not has_trgm:
+        pytest.skip("pg_trgm is not available on this server")
+
+
+@pytest.mark.parametrize("name", EMPLOYEE_LISTS)
+def test_get_employees_page_uses_index(plan_db, name):
+    engine, has_trgm = plan_db
+    skip_without_trgm(has_trgm, name)
+    query, _ = build_employees_query(**EMPLOYEE_LISTS[name])
+    assert_uses_index(engine, query.offset(0).limit(10))
+
+
+@pytest.mark.parametrize("name", EMPLOYEE_LISTS)
+def test_get_employees_count_uses_index(plan_db, name):
+    engine, has_trgm = plan_db
+    skip_without_trgm(has_trgm, name)
+    _, count_query = build_employees_query(**EMPLOYEE_LISTS[name])
+    assert_uses_index(engine, count_query)
+
+
+@pytest.mark.parametrize("name", USER_LISTS)
+def test_get_users_page_uses_index(plan_db, name):
+    engine, has_trgm = plan_db
+    skip_without_trgm(has_trgm, name)
+    query, _ = build_users_query(**USER_LISTS[name])
+    assert_uses_index(engine, query.offset(0).limit(10))
+
+
+@pytest.mark.parametrize("name", USER_LISTS)
+def test_get_users_count_uses_index(plan_db, name):
+    engine, has_trgm = plan_db
+    skip_without_trgm(has_trgm, name)
+    _, count_query = build_users_query(**USER_LISTS[name])
+    assert_uses_index(engine, count_query)
+
+
+def test_get_employee_subordinates_uses_index(plan_db):
+    engine, _ = plan_db
+    # Same statement as get_employee_subordinates
+    query = select(Employee).options(selectinload(Employee.user)).where(Employee.manager_id == 17)
+    assert_uses_index(engine, query)
+
+
+def test_employee_by_user_id_uses_index(plan_db):
+    engine, _ = plan_db
+    # Same statement as the existing-record check in create_employee and delete_user
+    query = select(Employee).where(Employee.user_id == 1234)
+    assert_uses_index(engine, query)